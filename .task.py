@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
 import argparse
+import functools
+import os
 import subprocess
 import sys
 
@@ -8,6 +10,12 @@ import sys
 FORMAT_HASH = '%H'
 FORMAT_SUMMARY = '%s'
 
+# All task branches start on top of this branch, commits below it are never part of a task.
+TASKS_BRANCH = 'origin/tasks'
+
+# Lines starting with these are left in a file with an unresolved conflict.
+CONFLICT_MARKERS = ('=======', '<<<<<<<', '>>>>>>>')
+
 
 class TaskException(Exception):
     pass
@@ -18,16 +26,31 @@ class TaskCheckException(TaskException):
         super().__init__("CHECK FAILED: %s" % message)
 
 
+def git_output(*args):
+    """Run a git command and get its output."""
+    result = subprocess.run(['git', *args], stdout=subprocess.PIPE, encoding="utf-8", check=True)
+    return result.stdout
+
+
 def branch_list():
-    """Get list of branches."""
-    result = subprocess.run(['git', 'branch'], stdout=subprocess.PIPE, check=True)
-    return [branch.strip() for branch in result.stdout.decode("utf-8").strip().split('\n')]
+    """Get names of local branches."""
+    return set(git_output('branch', '--format=%(refname:lstrip=2)').splitlines())
 
 
 def current_branch():
     """Get name of the current branch."""
-    result = subprocess.run(['git', 'branch', '--show-current'], stdout=subprocess.PIPE, check=True)
-    return result.stdout.decode("utf-8").strip()
+    return git_output('branch', '--show-current').strip()
+
+
+@functools.lru_cache(maxsize=None)
+def branch_tips():
+    """Get hexshas of all local and remote-tracking branches (keyed by branch names, remote-tracking
+    branches prefixed with the remote, e.g. `origin/simple`)."""
+    # Don't use refname:short, it turns a branch into `heads/<name>` if a tag has the same name.
+    output = git_output(
+        'for-each-ref', '--format=%(refname:lstrip=2) %(objectname)', 'refs/heads', 'refs/remotes'
+    )
+    return dict(line.split(' ', 1) for line in output.splitlines())
 
 
 def switch_branch(branch):
@@ -35,39 +58,77 @@ def switch_branch(branch):
     subprocess.run(['git', 'checkout', branch], check=True)
 
 
+def commit_range(branch_name):
+    """Get revision arguments selecting commits in given branch (on top of the tasks branch)."""
+    # End with `--`, so that a file named like the branch isn't an ambiguous argument.
+    return ['^' + TASKS_BRANCH, branch_name, '--']
+
+
+@functools.lru_cache(maxsize=None)
 def commit_log(branch_name, pretty_format=FORMAT_HASH):
     """Get commit log of commits in given branch (on top of the tasks branch)."""
-    result = subprocess.run(
-        ['git', 'log', '--pretty=' + pretty_format, 'origin/tasks..' + branch_name],
-        stdout=subprocess.PIPE,
-        check=True
+    if pretty_format == FORMAT_HASH:
+        # Plain hexshas don't need the formatting machinery of `git log`.
+        output = git_output('rev-list', *commit_range(branch_name))
+    else:
+        output = git_output('log', '--pretty=' + pretty_format, *commit_range(branch_name))
+    return tuple(output.splitlines())
+
+
+@functools.lru_cache(maxsize=None)
+def commit_log_summaries(branch_name):
+    """Get (hexsha, summary) pairs of commits in given branch (on top of the tasks branch)."""
+    output = git_output(
+        'log', '--pretty=%s %s' % (FORMAT_HASH, FORMAT_SUMMARY), *commit_range(branch_name)
     )
-    return result.stdout.decode("utf-8").strip().split('\n')
+    return tuple(tuple(line.split(' ', 1)) for line in output.splitlines())
 
 
-def commit_show(commit, pretty_format=FORMAT_HASH):
-    """Get commit information in particular format."""
-    result = subprocess.run(
-        ['git', 'show', '--pretty=' + pretty_format, '-s', commit], stdout=subprocess.PIPE, check=True
-    )
-    return result.stdout.decode("utf-8").strip()
+@functools.lru_cache(maxsize=None)
+def commit_count(branch_name):
+    """Get number of commits in given branch (on top of the tasks branch)."""
+    return int(git_output('rev-list', '--count', *commit_range(branch_name)))
+
+
+def clear_git_cache():
+    """Forget the cached output of git commands (needed after the branches change)."""
+    cached_functions = (branch_tips, commit_log, commit_log_summaries, commit_count)
+    for cached_function in cached_functions:
+        cached_function.cache_clear()
 
 
 def check_branches_identical(old_branch, new_branch):
     """Check all the commits in the two branches are the same."""
-    if commit_log(old_branch) != commit_log(new_branch):
+    # Branches pointing to the same commit have the same history, no need to list it.
+    tips = branch_tips()
+    if old_branch in tips and tips[old_branch] == tips.get(new_branch):
+        return
+
+    # Count the commits that are only in one of the branches, both counts are zero if the
+    # branches contain the same commits.
+    counts = git_output(
+        'rev-list', '--left-right', '--count', *commit_range(old_branch + '...' + new_branch)
+    )
+    if counts.split() != ['0', '0']:
         raise TaskCheckException('The `%s` branch changed.' % new_branch)
 
 
-def check_old_commits_unchanged(old_branch, new_branch):
-    """Check all the commits in old branch are unchanged in the new branch
-    (have the same hexsha)."""
-    new_hexshas = commit_log(new_branch)
-    new_summaries = commit_log(new_branch, FORMAT_SUMMARY)
+def check_old_commits_unchanged(old_branch, new_branch, skip=0):
+    """Check all the commits in old branch (except for the `skip` newest ones) are unchanged in the
+    new branch (have the same hexsha)."""
+    # Nothing to compare if the new branch still points to the same commit.
+    tips = branch_tips()
+    if old_branch in tips and tips[old_branch] == tips.get(new_branch):
+        return
+
+    new_hexshas = set()
+    new_summaries = set()
+    for hexsha, summary in commit_log_summaries(new_branch):
+        new_hexshas.add(hexsha)
+        new_summaries.add(summary)
 
-    for hexsha in commit_log(old_branch):
+    for hexsha, summary in commit_log_summaries(old_branch)[skip:]:
         if hexsha not in new_hexshas:
-            summary = commit_show(hexsha, FORMAT_SUMMARY)
             if summary not in new_summaries:
                 raise TaskCheckException('A commit is missing: %s' % summary)
             else:
@@ -75,7 +136,7 @@ def check_old_commits_unchanged(old_branch, new_branch):
 
 
 def check_commits_count(branch, expected_commits_count):
-    commits_count = len(commit_log(branch))
+    commits_count = commit_count(branch)
     diff = abs(commits_count - expected_commits_count)
     msg = (
         'Unexpected number of commits in branch {branch} ({diff} {quantifier} than expected).'
@@ -88,39 +149,86 @@ def check_commits_count(branch, expected_commits_count):
 
 def check_summaries(branch, expected, skip=0):
     actual = commit_log(branch, FORMAT_SUMMARY)
-    if actual[skip:] != expected[skip:]:
+    # The log is a tuple, a list of expected summaries would never compare equal to it.
+    if actual[skip:] != tuple(expected[skip:]):
         raise TaskCheckException(
             'Unexpected commits in the `%s` branch. Expected summaries: \n%s' % (branch, '\n'.join(expected))
         )
 
 
 def git_diff(*args):
-    result = subprocess.run(['git', 'diff', *args], stdout=subprocess.PIPE, check=True)
-    return result.stdout.decode("utf-8").strip()
+    return git_output('diff', *args).strip()
+
+
+def commit_patch(commit, reverse=False):
+    """Get the patch introduced by given commit (or the patch undoing it, if reverse)."""
+    trees = [commit, commit + '^'] if reverse else [commit + '^', commit]
+    return git_output('diff-tree', '-p', *trees).strip()
+
+
+def file_lines(branch, path):
+    """Get non-empty lines (stripped) of a file as committed in given branch."""
+    output = git_output('show', branch + ':' + path)
+    return tuple(line for line in map(str.strip, output.splitlines()) if line)
+
+
+def stash_list():
+    """Get the stash entries as listed by `git stash list`."""
+    return git_output('stash', 'list').strip()
 
 
 class Task():
     branch_names = []
+    description = ''
 
     def reset_branches(self):
-        """Delete all branches for this task and checkout them again from origin."""
+        """Reset all branches for this task to their state in origin."""
         subprocess.run(['git', 'reset', '--hard'])
         switch_branch('main')
+        tips = branch_tips()
+        upstreams = dict(
+            line.split(' ', 1) for line in git_output(
+                'for-each-ref',
+                '--format=%(refname:lstrip=2) %(upstream:lstrip=2)',
+                *('refs/heads/' + branch_name for branch_name in self.branch_names)
+            ).splitlines()
+        )
+        updates = []
         for branch_name in self.branch_names:
-            subprocess.run(['git', 'branch', '-D', branch_name])
+            local_hexsha = tips.get(branch_name)
+            origin_branch = 'origin/' + branch_name
+            origin_hexsha = tips.get(origin_branch)
+            if local_hexsha is None:
+                # Recreate a deleted branch (together with its upstream).
+                subprocess.run(['git', 'branch', '--track', branch_name, origin_branch], check=True)
+                continue
+            if local_hexsha != origin_hexsha:
+                updates.append(
+                    'update refs/heads/%s %s %s\n' % (branch_name, origin_hexsha, local_hexsha)
+                )
+            if upstreams.get(branch_name) != origin_branch:
+                # Restore the upstream as well, the tasks rely on it being the origin branch.
+                subprocess.run(
+                    ['git', 'branch', '--set-upstream-to=' + origin_branch, branch_name], check=True
+                )
+        if updates:
+            # Move all the changed branches at once, they don't need to be checked out.
             subprocess.run(
-                ['git', 'checkout', '-b', branch_name, 'origin/' + branch_name], check=True
+                ['git', 'update-ref', '-m', 'task: reset to origin', '--stdin'],
+                input=''.join(updates),
+                encoding="utf-8",
+                check=True
             )
-        switch_branch('main')
-
-
-class CherryPick(Task):
-    branch_names = ['cherry-pick-main', 'cherry-pick-feature']
+        clear_git_cache()
 
     def start(self):
         self.reset_branches()
+        print(self.description)
 
-        print("""
+
+class CherryPick(Task):
+    branch_names = ['cherry-pick-main', 'cherry-pick-feature']
+    description = """
 =================
 Task: cherry-pick
 =================
@@ -142,8 +250,15 @@ Then the result should look like this:
             G---H---I---J---C`--D` main
 
 (To show only task-related branches in gitk: gitk --branches=cherry-pick-*)
-""")
-
+"""
+
+    expected_summaries = (
+        'Add the name of the author of the "Fame is a bee"',
+        'Finisth the poem "Fame is a bee"',
+        'Add the first line',
+        'Add a poem: I started Early',
+        'Add a place for poems',
+    )
 
     def check(self):
         # Check the cherry-pick-feature branch hasn't changed.
@@ -156,25 +271,14 @@ Then the result should look like this:
         check_commits_count('cherry-pick-main', 5)
 
         # Check the commit order
-        expected_summaries = [
-            'Add the name of the author of the "Fame is a bee"',
-            'Finisth the poem "Fame is a bee"',
-            'Add the first line',
-            'Add a poem: I started Early',
-            'Add a place for poems',
-        ]
-        check_summaries('cherry-pick-main', expected_summaries)
+        check_summaries('cherry-pick-main', self.expected_summaries)
 
         print("OK")
 
 
 class ConflictCherryPick(Task):
     branch_names = ['conflict-cherry-pick-main', 'conflict-cherry-pick-feature']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ==========================
 Task: conflict-cherry-pick
 ==========================
@@ -196,8 +300,22 @@ Then the result should look like this:
             G---H---I---J---C`--D` main
 
 (To show only task-related branches in gitk: gitk --branches=conflict-cherry-pick-*)
-""")
+"""
 
+    expected_summaries = (
+        'Add the "Fame is a bee" poem',
+        'Add a title and author of "Fame is a bee"',
+        'Create a file with poems',
+    )
+
+    expected_lines = (
+        '# Fame is a bee',
+        '*By Emily Dickinson*',
+        'Fame is a bee.',
+        'It has a song --',
+        'It has a sting --',
+        'Ah, too, it has a wing.',
+    )
 
     def check(self):
         # Check the conflict-cherry-pick-feature branch hasn't changed.
@@ -210,35 +328,20 @@ Then the result should look like this:
         check_commits_count('conflict-cherry-pick-main', 3)
 
         # Check the commit order
-        expected_summaries = [
-            'Add the "Fame is a bee" poem',
-            'Add a title and author of "Fame is a bee"',
-            'Create a file with poems',
-        ]
-        check_summaries('conflict-cherry-pick-main', expected_summaries)
+        check_summaries('conflict-cherry-pick-main', self.expected_summaries)
 
         # Check the file contains the correct changes
-        subprocess.run(['git', 'switch', 'conflict-cherry-pick-main'], check=True)
-        with open('poems.md') as f:
-            lines = [line.strip() for line in f if line.strip()]
+        lines = file_lines('conflict-cherry-pick-main', 'poems.md')
         for line in lines:
-            if line[:7] in ["=======", "<<<<<<<", ">>>>>>>"]:
+            if line.startswith(CONFLICT_MARKERS):
                 raise TaskCheckException(
                     'The conflict was not resolved, there are some conflict markings '
                     'left: %s' % line[:7]
                 )
-        expected_lines = [
-            '# Fame is a bee',
-            '*By Emily Dickinson*',
-            'Fame is a bee.',
-            'It has a song --',
-            'It has a sting --',
-            'Ah, too, it has a wing.',
-        ]
-        if lines != expected_lines:
+        if lines != self.expected_lines:
             raise TaskCheckException(
                 'The content of poems.md is different than expected. '
-                'Expected lines (without empty lines):\n%s' % '\n'.join(expected_lines)
+                'Expected lines (without empty lines):\n%s' % '\n'.join(self.expected_lines)
             )
 
         print("OK")
@@ -246,11 +349,7 @@ Then the result should look like this:
 
 class Merge(Task):
     branch_names = ['merge-main', 'merge-feature']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ===========
 Task: merge
 ===========
@@ -273,8 +372,7 @@ Then the result should look like this:
 The merge commit can contain a message describing the whole feature that was merged.
 
 (To show only task-related branches in gitk: gitk --branches=merge-*)
-""")
-
+"""
 
     def check(self):
         # Check the merge-feature branch hasn't changed.
@@ -288,13 +386,16 @@ The merge commit can contain a message describing the whole feature that was mer
         # Check the commits count (old ones, plus one merge commit)
         check_commits_count('merge-main', 7)
 
-        # Check last commit is the new merge commit
-        last_commit_hexsha = commit_show('merge-main')
-        last_commit_summary = commit_show('merge-main', FORMAT_SUMMARY)
+        # Check last commit is the new merge commit (the logs are already cached from the checks
+        # above, the tip of a branch is always listed first)
+        last_commit_hexsha, last_commit_summary = commit_log_summaries('merge-main')[0]
 
-        old_hexshas = commit_log('origin/merge-main') + commit_log('origin/merge-feature')
-        old_summaries = commit_log('origin/merge-main', FORMAT_SUMMARY)
-        old_summaries += commit_log('origin/merge-feature', FORMAT_SUMMARY)
+        old_hexshas = set()
+        old_summaries = set()
+        for old_branch in ('origin/merge-main', 'origin/merge-feature'):
+            for hexsha, summary in commit_log_summaries(old_branch):
+                old_hexshas.add(hexsha)
+                old_summaries.add(summary)
 
         if last_commit_hexsha in old_hexshas:
             raise TaskCheckException('The last commit is not new: %s' % last_commit_summary)
@@ -308,11 +409,7 @@ The merge commit can contain a message describing the whole feature that was mer
 
 class Rebase(Task):
     branch_names = ['rebase-main', 'rebase-feature']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ============
 Task: rebase
 ============
@@ -332,8 +429,16 @@ Then the result should look like this:
             D---E---F---G main
 
 (To show only task-related branches in gitk: gitk --branches=rebase-*)
-""")
-
+"""
+
+    expected_summaries = (
+        'Add a poem I started early',
+        'Update the poem to the newer version',
+        'Add "by" before the name of the author',
+        'Add a poem: Forever is composed of nows',
+        'Add the missing name of the author',
+        'Add the poem The Chariot',
+    )
 
     def check(self):
         # Check the rebase-main branch hasn't changed.
@@ -346,26 +451,14 @@ Then the result should look like this:
         check_commits_count('rebase-feature', 6)
 
         # Check the commit order
-        expected_summaries = [
-            'Add a poem I started early',
-            'Update the poem to the newer version',
-            'Add "by" before the name of the author',
-            'Add a poem: Forever is composed of nows',
-            'Add the missing name of the author',
-            'Add the poem The Chariot',
-        ]
-        check_summaries('rebase-feature', expected_summaries)
+        check_summaries('rebase-feature', self.expected_summaries)
 
         print("OK")
 
 
 class ConflictRebase(Task):
     branch_names = ['conflict-rebase-main', 'conflict-rebase-feature']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 =====================
 Task: conflict-rebase
 =====================
@@ -387,8 +480,22 @@ Then the result should look like this:
             D---E---F---G main
 
 (To show only task-related branches in gitk: gitk --branches=conflict-rebase-*)
-""")
+"""
+
+    expected_summaries = (
+        'Fix a typo in the word "forever" in "Forever is composed of nows"',
+        'Split the poem "Forever is composed by nows" correctly into lines',
+        'Add a poem "I started early"',
+        'Add a poem "The Chariot"',
+        'Add a poem "Forever is composed of nows"',
+    )
 
+    expected_start = (
+        "# Forever – is composed of Nows",
+        "*By Elimy Dickinson*",
+        "Forever – is composed of Nows –",
+        "‘Tis not a different time –",
+    )
 
     def check(self):
         # Check the conflict-rebase-main branch hasn't changed.
@@ -401,30 +508,14 @@ Then the result should look like this:
         check_commits_count('conflict-rebase-feature', 5)
 
         # Check the commit order
-        expected_summaries = [
-            'Fix a typo in the word "forever" in "Forever is composed of nows"',
-            'Split the poem "Forever is composed by nows" correctly into lines',
-            'Add a poem "I started early"',
-            'Add a poem "The Chariot"',
-            'Add a poem "Forever is composed of nows"',
-        ]
-        check_summaries('conflict-rebase-feature', expected_summaries)
+        check_summaries('conflict-rebase-feature', self.expected_summaries)
 
         # Check the forever-is-composed-of-nows.md file is correct
-        expected_start = [
-            "# Forever – is composed of Nows",
-            "*By Elimy Dickinson*",
-            "Forever – is composed of Nows –",
-            "‘Tis not a different time –",
-        ]
-        if current_branch() != 'conflict-rebase-feature':
-            switch_branch('conflict-rebase-feature')
-        with open('forever-is-composed-of-nows.md') as f:
-            lines = [line.strip() for line in f if line.strip()]
-        if lines[:4] != expected_start:
+        lines = file_lines('conflict-rebase-feature', 'forever-is-composed-of-nows.md')
+        if lines[:4] != self.expected_start:
             raise TaskCheckException(
                 'The content of forever-is-composed-of-nows.md is different than expected. '
-                'It should start with (without empty lines):\n%s' % '\n'.join(expected_start)
+                'It should start with (without empty lines):\n%s' % '\n'.join(self.expected_start)
             )
 
         print("OK")
@@ -432,11 +523,7 @@ Then the result should look like this:
 
 class ResetHard(Task):
     branch_names = ['simple']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ================
 Task: reset-hard
 ================
@@ -451,91 +538,60 @@ If the history looks like this:
 Then the result of resetting to commit E should look like this:
 
             A---B---C---D---E main
-""")
+"""
+
+    expected_summaries = (
+        'Fix the name of the poem: Because I could not stop for Death',
+        'Keep both versions of the poem after all',
+        'Update the poem to the newer version',
+        'Add "by" before the name of the author',
+        'Add a poem: Forever is composed of nows',
+        'Add the missing name of the author',
+        'Add the poem The Chariot',
+    )
 
     def check(self):
-        # Check all commits from the origin/simple are present in simple.
-        new_hexshas = commit_log('simple')
-        new_summaries = commit_log('simple', FORMAT_SUMMARY)
-        skip_first = True
-        for hexsha in commit_log('origin/simple'):
-            if skip_first:
-                skip_first = False
-                continue
-            if hexsha not in new_hexshas:
-                summary = commit_show(hexsha, FORMAT_SUMMARY)
-                if summary not in new_summaries:
-                    raise TaskCheckException('A commit is missing: %s' % summary)
-                else:
-                    raise TaskCheckException(
-                        'A commit was unexpectedly modified: %s' % summary
-                    )
+        # Check all commits from the origin/simple (except the last one) are present in simple.
+        check_old_commits_unchanged('origin/simple', 'simple', skip=1)
 
         # Check the commits count
         check_commits_count('simple', 7)
 
         # Check the commit order
-        expected_summaries = [
-            'Fix the name of the poem: Because I could not stop for Death',
-            'Keep both versions of the poem after all',
-            'Update the poem to the newer version',
-            'Add "by" before the name of the author',
-            'Add a poem: Forever is composed of nows',
-            'Add the missing name of the author',
-            'Add the poem The Chariot',
-        ]
-        check_summaries('simple', expected_summaries)
+        check_summaries('simple', self.expected_summaries)
 
         print("OK")
 
 class ResetSoft(Task):
     branch_names = ['simple']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ================
 Task: reset-soft
 ================
 
 Reset the `simple` branch to the point right before the last commit, but keep the index \
 and the working tree.
-""")
-
+"""
+
+    expected_summaries = (
+        'Fix the name of the poem: Because I could not stop for Death',
+        'Keep both versions of the poem after all',
+        'Update the poem to the newer version',
+        'Add "by" before the name of the author',
+        'Add a poem: Forever is composed of nows',
+        'Add the missing name of the author',
+        'Add the poem The Chariot',
+    )
 
     def check(self):
-        # Check all commits from the origin/reset-soft-main are present in reset-soft-main.
-        new_hexshas = commit_log('simple')
-        new_summaries = commit_log('simple', FORMAT_SUMMARY)
-        skip_first = True
-        for hexsha in commit_log('origin/simple'):
-            if skip_first:
-                skip_first = False
-                continue
-            if hexsha not in new_hexshas:
-                summary = commit_show(hexsha, FORMAT_SUMMARY)
-                if summary not in new_summaries:
-                    raise TaskCheckException('A commit is missing: %s' % summary)
-                else:
-                    raise TaskCheckException(
-                        'A commit was unexpectedly modified: %s' % summary
-                    )
+        # Check all commits from the origin/simple (except the last one) are present in simple.
+        check_old_commits_unchanged('origin/simple', 'simple', skip=1)
 
         # Check the commits count
         check_commits_count('simple', 7)
 
         # Check the commit order
-        expected_summaries = [
-            'Fix the name of the poem: Because I could not stop for Death',
-            'Keep both versions of the poem after all',
-            'Update the poem to the newer version',
-            'Add "by" before the name of the author',
-            'Add a poem: Forever is composed of nows',
-            'Add the missing name of the author',
-            'Add the poem The Chariot',
-        ]
-        check_summaries('simple', expected_summaries)
+        check_summaries('simple', self.expected_summaries)
 
         diff_staged = git_diff('--staged')
         diff_resetted_commit = git_diff('origin/simple^', 'origin/simple')
@@ -547,11 +603,7 @@ and the working tree.
 
 class Revert(Task):
     branch_names = ['simple']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ============
 Task: revert
 ============
@@ -569,8 +621,19 @@ If the history looks like this:
 Then the result should look like this:
 
             A---B---C---D---E---F---D' main
-""")
-
+"""
+
+    expected_summaries = (
+        '<REVERT COMMIT>',
+        'Add a poem I started early',
+        'Fix the name of the poem: Because I could not stop for Death',
+        'Keep both versions of the poem after all',
+        'Update the poem to the newer version',
+        'Add "by" before the name of the author',
+        'Add a poem: Forever is composed of nows',
+        'Add the missing name of the author',
+        'Add the poem The Chariot',
+    )
 
     def check(self):
         # Check all commits from the origin/simple are present in simple.
@@ -580,23 +643,13 @@ Then the result should look like this:
         check_commits_count('simple', 9)
 
         # Check the commit order
-        expected_summaries = [
-            '<REVERT COMMIT>',
-            'Add a poem I started early',
-            'Fix the name of the poem: Because I could not stop for Death',
-            'Keep both versions of the poem after all',
-            'Update the poem to the newer version',
-            'Add "by" before the name of the author',
-            'Add a poem: Forever is composed of nows',
-            'Add the missing name of the author',
-            'Add the poem The Chariot',
-        ]
-        check_summaries('simple', expected_summaries, skip=1)
-
-        # Check the last commit is the correct reverted commit by comparing diffs
+        check_summaries('simple', self.expected_summaries, skip=1)
+
+        # Check the last commit is the correct reverted commit by comparing diffs (the revert
+        # commit applied in reverse has to be the same as the reverted commit)
         commits = commit_log('simple')
-        expected_diff = git_diff(commits[7], commits[6])
-        revert_commit_diff = git_diff(commits[0], commits[1])
+        expected_diff = commit_patch(commits[6])
+        revert_commit_diff = commit_patch(commits[0], reverse=True)
         if revert_commit_diff != expected_diff:
             raise TaskCheckException(
                 'The last commit is not the reverted commit.\n\n'
@@ -607,11 +660,7 @@ Then the result should look like this:
 
 class ChangeMessage(Task):
     branch_names = ["change-message-tasks"]
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ====================
 Task: change-message
 ====================
@@ -624,39 +673,35 @@ Use interactive rebase to replace the commit message, so that the new message is
 
 Make sure that the commit history remains unchanged, except for this one commit message.
 
-""")
+"""
+
+    expected_summaries = (
+        'Add text.',
+        "Add 'After Great Pain' by Emily Dickinson.",
+    )
 
     def check(self):
         # Check the commits count
         check_commits_count('change-message-tasks', 2)
 
         # Check the commit order
-        expected_summaries = [
-            'Add text.',
-            "Add 'After Great Pain' by Emily Dickinson.",
-        ]
-
         main_summaries = commit_log('change-message-tasks', FORMAT_SUMMARY)
 
         # Check that the commit message has been changed.
-        if main_summaries[1] != expected_summaries[1]:
+        if main_summaries[1] != self.expected_summaries[1]:
             raise TaskCheckException(
                 'The commit message seems not be changed correctly.\nCurrent message: '
-                '%s\nExpected message: %s' % (main_summaries[1], expected_summaries[1]))
+                '%s\nExpected message: %s' % (main_summaries[1], self.expected_summaries[1]))
 
         # Check summaries
-        check_summaries('change-message-tasks', expected_summaries)
+        check_summaries('change-message-tasks', self.expected_summaries)
 
         print("OK")
 
 
 class SquashCommit(Task):
     branch_names = ["squash-commits-tasks"]
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ====================
 Task: squash-commits
 ====================
@@ -669,7 +714,11 @@ the very first commit. All following commits should be squashed into the first o
 Use interactive rebase to squash the commits, so that there is only the very first commit left in \
 the branch, while the content of the branch remains unchanged.
 
-""")
+"""
+
+    expected_summaries = (
+        "Add 'Fame is a bee' by Emily Dickinson.",
+    )
 
     def check(self):
 
@@ -677,25 +726,19 @@ the branch, while the content of the branch remains unchanged.
         check_commits_count('squash-commits-tasks', 1)
 
         # Check the commit order.
-        expected_summaries = [
-            "Add 'Fame is a bee' by Emily Dickinson.",
-        ]
-
         main_summaries = commit_log('squash-commits-tasks', FORMAT_SUMMARY)
 
-        if main_summaries[0] != "Add 'Fame is a bee' by Emily Dickinson.":
+        if main_summaries[0] != self.expected_summaries[0]:
             raise TaskCheckException(
                 'The message of the first commit has changed, but it should be the same.\n'
                 'Expected commit message: %s\nCurrent commit message: %s' % (
-                    expected_summaries[0], main_summaries[0]
+                    self.expected_summaries[0], main_summaries[0]
                 )
              )
 
         # Check that there is no difference in content between the original and the squashed
         # repository.
-        original = commit_show('origin/squash-commits-tasks')
-        new = commit_show('squash-commits-tasks')
-        diff = git_diff(original, new)
+        diff = git_diff('origin/squash-commits-tasks', 'squash-commits-tasks')
         if diff:
             raise TaskCheckException(
                 'The content of the squashed branch is different from the original branch.\n'
@@ -706,11 +749,7 @@ the branch, while the content of the branch remains unchanged.
 
 class ReorganizeCommits(Task):
     branch_names = ["reorganize-commits-tasks"]
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ========================
 Task: reorganize-commits
 ========================
@@ -725,7 +764,12 @@ commits left in the branch, while the content of the branch remains unchanged.
 
 The final commits should be named `Poem 1: Add a poem.` and `Poem 2: Add a poem.`
 
-""")
+"""
+
+    expected_summaries = (
+        "Poem 2: Add a poem.",
+        "Poem 1: Add a poem.",
+    )
 
     def check(self):
 
@@ -733,34 +777,27 @@ The final commits should be named `Poem 1: Add a poem.` and `Poem 2: Add a poem.
         check_commits_count('reorganize-commits-tasks', 2)
 
         # Check the commit order.
-        expected_summaries = [
-            "Poem 2: Add a poem.",
-            "Poem 1: Add a poem.",
-        ]
-
         main_summaries = commit_log('reorganize-commits-tasks', FORMAT_SUMMARY)
 
-        if main_summaries[0] != "Poem 2: Add a poem.":
+        if main_summaries[0] != self.expected_summaries[0]:
             raise TaskCheckException(
                 'The message of the second commit differs from what is expected.\n'
                 'Expected commit message: %s\nCurrent commit message: %s' % (
-                    expected_summaries[0], main_summaries[0]
+                    self.expected_summaries[0], main_summaries[0]
                 )
              )
 
-        if main_summaries[1] != "Poem 1: Add a poem.":
+        if main_summaries[1] != self.expected_summaries[1]:
             raise TaskCheckException(
                 'The message of the first commit differs from what is expected.\n'
                 'Expected commit message: %s\nCurrent commit message: %s' % (
-                    expected_summaries[1], main_summaries[1]
+                    self.expected_summaries[1], main_summaries[1]
                 )
              )
 
         # Check that there is no difference in content between the original and the squashed
         # repository.
-        original = commit_show('origin/reorganize-commits-tasks')
-        new = commit_show('reorganize-commits-tasks')
-        diff = git_diff(original, new)
+        diff = git_diff('origin/reorganize-commits-tasks', 'reorganize-commits-tasks')
         if diff:
             raise TaskCheckException(
                 'The content of the squashed branch is different from the original branch.\n'
@@ -771,11 +808,7 @@ The final commits should be named `Poem 1: Add a poem.` and `Poem 2: Add a poem.
 
 class CommitAmend(Task):
     branch_names = ["simple"]
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ==================
 Task: commit-amend
 ==================
@@ -791,7 +824,7 @@ to the existing commit instead.
 After the change, there should be the same number of commits in the branch with the same commit \
 messages as before!
 
-""")
+"""
 
     def check(self):
         # Check the commits count
@@ -809,9 +842,7 @@ messages as before!
             raise TaskCheckException('The commit messages on the branch `simple` changed.')
 
         # Check that there is a difference in content between the original and the new commit.
-        original = commit_show('origin/simple')
-        new = commit_show('simple')
-        diff = git_diff(original, new)
+        diff = git_diff('origin/simple', 'simple')
         if not diff:
             raise TaskCheckException(
                 'The content of the branch seems not to be corrected! '
@@ -827,11 +858,7 @@ messages as before!
 
 class Stash(Task):
     branch_names = ["stash-tasks"]
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ===========
 Task: stash
 ===========
@@ -845,25 +872,14 @@ not want to lose any changes you have already made in your local branch.
 
 Use stash to protect your changes and reset local branch onto the remote one.
 
-""")
+"""
 
     def check(self):
-        # Check the apply-stash-tasks branch hasn't changed.
+        # Check the stash-tasks branch hasn't changed (same commits, so also the same content).
         check_branches_identical('origin/stash-tasks', 'stash-tasks')
 
-        # Check that there is a difference in content between the original and the new commit.
-        original = commit_show('origin/stash-tasks')
-        new = commit_show('stash-tasks')
-        diff = git_diff(original, new)
-        if diff:
-            raise TaskCheckException(
-                'The content of the branch is different from the original branch.\n'
-                'See the diff: \n%s' % diff)
-
         # Check that there is a stash saved.
-        result = subprocess.run(['git', 'stash', 'list'], stdout=subprocess.PIPE, check=True)
-        stash_list = result.stdout.decode("utf-8").strip()
-        if not stash_list:
+        if not stash_list():
             raise TaskCheckException(
                 'Nothing has been put into stash. The content is not protected.\n\n'
                 'Expected was something like "stash@{0}: WIP on stash-tasks: ..."')
@@ -873,11 +889,7 @@ Use stash to protect your changes and reset local branch onto the remote one.
 
 class ApplyStash(Task):
     branch_names = ["apply-stash-tasks"]
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 =================
 Task: apply-stash
 =================
@@ -894,7 +906,12 @@ Use stash to protect your changes and reset local branch onto the remote one. Th
 stashed content and delete it from the stash. Stage the new content and commit it. Make the \
 commit message be 'Add my favourite poem.'
 
-""")
+"""
+
+    expected_summaries = (
+        "Add my favourite poem.",
+        "Add a poem skeleton.",
+    )
 
     def check(self):
 
@@ -902,51 +919,38 @@ commit message be 'Add my favourite poem.'
         check_commits_count('apply-stash-tasks', 2)
 
         # Check the commit order.
-        expected_summaries = [
-            "Add my favourite poem.",
-            "Add a poem skeleton.",
-        ]
-
         main_summaries = commit_log('apply-stash-tasks', FORMAT_SUMMARY)
 
-        if main_summaries[0] != "Add my favourite poem.":
+        if main_summaries[0] != self.expected_summaries[0]:
             raise TaskCheckException(
                 'The message of the commit differs from what is expected.\n'
                 'Expected commit message: %s\nCurrent commit message: %s' % (
-                    expected_summaries[0], main_summaries[0]
+                    self.expected_summaries[0], main_summaries[0]
                 )
              )
 
         # Check summaries
-        check_summaries('apply-stash-tasks', expected_summaries)
+        check_summaries('apply-stash-tasks', self.expected_summaries)
 
         # Check that there is a difference in content between the original and the new commit.
-        original = commit_show('origin/apply-stash-tasks')
-        new = commit_show('apply-stash-tasks')
-        diff = git_diff(original, new)
+        diff = git_diff('origin/apply-stash-tasks', 'apply-stash-tasks')
         if not diff:
             raise TaskCheckException(
                 'The content of the branch seems not to be correctly applied from stash!')
 
-        # Check that there is a stash saved.
-        result = subprocess.run(['git', 'stash', 'list'], stdout=subprocess.PIPE, check=True)
-        stash_list = result.stdout.decode("utf-8").strip()
-
-        if stash_list:
+        # Check that the stash is empty.
+        stash = stash_list()
+        if stash:
             raise TaskCheckException(
                 'There is something in the stash, but the stash should be empty.\n\n'
-                'See stash:\n%s' % stash_list)
+                'See stash:\n%s' % stash)
 
         print("OK")
 
 
 class ConflictRevert(Task):
     branch_names = ['conflict-revert-main']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 =====================
 Task: conflict-revert
 =====================
@@ -969,8 +973,31 @@ Then the result should look like this:
             A---B---C---D---E---F---G---D' main
 
 (To show only task-related branches in gitk: gitk --branches=conflict-revert-*)
-""")
+"""
 
+    expected_summaries = (
+        '<REVERT COMMIT>',
+        'Fix typos in the name and author of the second poem',
+        'Add another poem: Fame is a bee',
+        'Add poems by Emily Dickinson',
+    )
+
+    expected_lines = (
+        '# Forever – is composed of Nows',
+        '*By Emily Dickinson*',
+        'Forever – is composed of Nows –',
+        '‘Tis not a different time –',
+        'Except for Infiniteness –',
+        'And Latitude of Home –',
+        'From this – experienced Here –',
+        'Remove the Dates – to These –',
+        'Let Months dissolve in further Months –',
+        'And Years – exhale in Years –',
+        'Without Debate – or Pause –',
+        'Or Celebrated Days –',
+        'No different Our Years would be',
+        'From Anno Dominies –',
+    )
 
     def check(self):
         # Check all commits from the origin/conflict-revert-main are present in
@@ -981,20 +1008,12 @@ Then the result should look like this:
         check_commits_count('conflict-revert-main', 4)
 
         # Check the commit order
-        expected_summaries = [
-            '<REVERT COMMIT>',
-            'Fix typos in the name and author of the second poem',
-            'Add another poem: Fame is a bee',
-            'Add poems by Emily Dickinson',
-        ]
-        check_summaries('conflict-revert-main', expected_summaries, skip=1)
+        check_summaries('conflict-revert-main', self.expected_summaries, skip=1)
 
         # Check the file contains the correct changes
-        subprocess.run(['git', 'switch', 'conflict-revert-main'], check=True)
-        with open('poems.md') as f:
-            lines = [line.strip() for line in f if line.strip()]
+        lines = file_lines('conflict-revert-main', 'poems.md')
         for line in lines:
-            if line[:7] in ["=======", "<<<<<<<", ">>>>>>>"]:
+            if line.startswith(CONFLICT_MARKERS):
                 raise TaskCheckException(
                     'The conflict was not resolved, there are some conflict markings '
                     'left: %s' % line[:7]
@@ -1004,26 +1023,10 @@ Then the result should look like this:
                     'The conflict was not resolved correctly: the typo that was fixed '
                     'in one of the commits is there again: # Fever – is composed of Nows'
                 )
-        expected_lines = [
-            '# Forever – is composed of Nows',
-            '*By Emily Dickinson*',
-            'Forever – is composed of Nows –',
-            '‘Tis not a different time –',
-            'Except for Infiniteness –',
-            'And Latitude of Home –',
-            'From this – experienced Here –',
-            'Remove the Dates – to These –',
-            'Let Months dissolve in further Months –',
-            'And Years – exhale in Years –',
-            'Without Debate – or Pause –',
-            'Or Celebrated Days –',
-            'No different Our Years would be',
-            'From Anno Dominies –',
-        ]
-        if lines != expected_lines:
+        if lines != self.expected_lines:
             raise TaskCheckException(
                 'The content of poems.md is different than expected. '
-                'Expected lines (without empty lines):\n%s' % '\n'.join(expected_lines)
+                'Expected lines (without empty lines):\n%s' % '\n'.join(self.expected_lines)
             )
 
         print("OK")
@@ -1031,26 +1034,25 @@ Then the result should look like this:
 
 class NewBranch(Task):
     branch_names = ['simple']
-
-    def start(self):
-        self.reset_branches()
-        subprocess.run(['git', 'branch', '-D', 'new-branch'])
-
-        print("""
+    description = """
 ================
 Task: new-branch
 ================
 
 Create a new branch named `new-branch` starting of the `simple` branch.
-""")
+"""
 
+    def start(self):
+        self.reset_branches()
+        subprocess.run(['git', 'branch', '-D', 'new-branch'])
+        print(self.description)
 
     def check(self):
         # Check the simple branch hasn't changed.
         check_branches_identical('origin/simple', 'simple')
 
         # Check branch exists.
-        if 'new-branch' not in branch_list() and '* new-branch' not in branch_list():
+        if 'new-branch' not in branch_list():
             raise TaskCheckException('Branch "new-branch" does not exist.')
 
         # Check new-branch is the same as simple.
@@ -1064,11 +1066,7 @@ Create a new branch named `new-branch` starting of the `simple` branch.
 
 class Drop(Task):
     branch_names = ['drop-main']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ==========
 Task: drop
 ==========
@@ -1087,33 +1085,29 @@ Then the result should look like this:
             A---B---C---E---F main
 
 (To show only task-related branches in gitk: gitk --branches=drop-*)
-""")
-
+"""
+
+    expected_summaries = (
+        'Add explanations to the branching commands',
+        'Add basic cheatsheet for working with branches',
+        'Add explanations to individual commands',
+        'Add commands for inspecting the repo',
+        'Add cheatsheet with basic git commands',
+    )
 
     def check(self):
         # Check the commits count
         check_commits_count('drop-main', 5)
 
         # Check the commit order
-        expected_summaries = [
-            'Add explanations to the branching commands',
-            'Add basic cheatsheet for working with branches',
-            'Add explanations to individual commands',
-            'Add commands for inspecting the repo',
-            'Add cheatsheet with basic git commands',
-        ]
-        check_summaries('drop-main', expected_summaries)
+        check_summaries('drop-main', self.expected_summaries)
 
         print("OK")
 
 
 class Blame(Task):
     branch_names = ['blame-main']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ===========
 Task: blame
 ===========
@@ -1123,7 +1117,7 @@ In a branch `blame-main`, who last changed the line 78 in the file `source/cheat
 Who originally introduced the typo in the word "download"?
 
 (To show only task-related branches in gitk: gitk --branches=blame-*)
-""")
+"""
 
     def check(self):
         answer = input(
@@ -1140,17 +1134,13 @@ Who originally introduced the typo in the word "download"?
 
 class Add(Task):
     branch_names = ['simple']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 =========
 Task: add
 =========
 
 Create two new files named "day" and "night" and add the "day" file to the index.
-""")
+"""
 
     def check(self):
         # Check the main branch hasn't changed.
@@ -1161,15 +1151,17 @@ Create two new files named "day" and "night" and add the "day" file to the index
                 'In this task, you should only add the file to the index, not create a commit. '
                 'To try once more, call the `start` command again.')
 
-        result = subprocess.run(['git', 'status', '--porcelain'], stdout=subprocess.PIPE, check=True)
-        status = result.stdout.decode("utf-8").strip()
         added_files = []
         untracked_files = []
         other_files = []
-        for line in status.split('\n'):
-            if line:
-                action, file_path = line.split(' ', 1)
-                file_path = file_path.strip()
+        entries = iter(git_output('status', '--porcelain', '-z').split('\0'))
+        for entry in entries:
+            if entry:
+                # Entries are "XY PATH" with unquoted paths, a rename or a copy is followed by an
+                # entry with the original path.
+                action, file_path = entry[:2].strip(), entry[3:]
+                if action[:1] in ('R', 'C'):
+                    next(entries)
                 if action == 'A':
                     added_files.append(file_path)
                 elif action == '??':
@@ -1180,7 +1172,7 @@ Create two new files named "day" and "night" and add the "day" file to the index
         if not added_files:
             raise TaskCheckException(
                 'There are no paths added to the index. It should contain the "day" file.')
-        if added_files and added_files != ['day']:
+        if added_files != ['day']:
             raise TaskCheckException(
                 'There are different paths in index that expected. It should contain only '
                 'the "day" file. List of added files: %s' % ', '.join(added_files))
@@ -1197,11 +1189,7 @@ Create two new files named "day" and "night" and add the "day" file to the index
 
 class Commit(Task):
     branch_names = ['simple']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ============
 Task: commit
 ============
@@ -1209,7 +1197,7 @@ Task: commit
 Switch to a branch named `simple`.
 
 Then create a new file named "new-file" and commit it.
-""")
+"""
 
     def check(self):
         # Check the commits count
@@ -1219,10 +1207,7 @@ Then create a new file named "new-file" and commit it.
         check_old_commits_unchanged('origin/simple', 'simple')
 
         # Check the last commit contains only the one changed file
-        result = subprocess.run(
-            ['git', 'show', '--pretty=format:', '--name-only'], stdout=subprocess.PIPE, check=True
-        )
-        changed_files = result.stdout.decode("utf-8").strip().split('\n')
+        changed_files = git_output('show', '--pretty=format:', '--name-only').splitlines()
         if not changed_files:
             raise TaskCheckException(
                 'The "new-file" file is not in the commit. '
@@ -1240,23 +1225,19 @@ Then create a new file named "new-file" and commit it.
 
 class Switch(Task):
     branch_names = ['simple']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ============
 Task: switch
 ============
 
 Switch to a branch named "simple".
-""")
+"""
 
     def check(self):
         # Check current branch is "simple"
-        if 'simple' != current_branch():
-            raise TaskCheckException(
-                'Current branch is not "simple", but "%s".' % current_branch())
+        branch = current_branch()
+        if 'simple' != branch:
+            raise TaskCheckException('Current branch is not "simple", but "%s".' % branch)
 
         # Check the simple branch was not modified.
         check_branches_identical('origin/simple', 'simple')
@@ -1266,11 +1247,7 @@ Switch to a branch named "simple".
 
 class Log(Task):
     branch_names = ['simple']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 =========
 Task: log
 =========
@@ -1280,7 +1257,7 @@ In a branch `simple`, who made the last but one commit?
 What is the summary of the last but one commit?
 
 What line was added in the last but one commit?
-""")
+"""
 
     def check(self):
         answer = input("In a branch `simple`, who made the last but one commit? ")
@@ -1297,17 +1274,13 @@ What line was added in the last but one commit?
 
 class Diff(Task):
     branch_names = ['diff-one', 'diff-two']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ==========
 Task: diff
 ==========
 
 What is the difference between `diff-one` and `diff-two` branches?
-""")
+"""
 
     def check(self):
         answer = input("Which branch contains additional line? ")
@@ -1321,69 +1294,64 @@ What is the difference between `diff-one` and `diff-two` branches?
 
 class DeleteBranch(Task):
     branch_names = ['simple']
-
-    def start(self):
-        self.reset_branches()
-
-        print("""
+    description = """
 ===================
 Task: delete-branch
 ===================
 
 Delete branch named `simple`.
-""")
+"""
 
     def check(self):
-        if 'simple' in branch_list() or '* simple' in branch_list():
+        if 'simple' in branch_list():
             raise TaskCheckException('The branch `simple` still exists.')
 
         print("OK")
 
 
+# Tasks in the order they are listed in the README.
+TASKS = {
+    'switch': Switch,
+    'add': Add,
+    'commit': Commit,
+    'log': Log,
+    'diff': Diff,
+    'new-branch': NewBranch,
+    'delete-branch': DeleteBranch,
+    'merge': Merge,
+    'rebase': Rebase,
+    'conflict-rebase': ConflictRebase,
+    'commit-amend': CommitAmend,
+    'reset-hard': ResetHard,
+    'reset-soft': ResetSoft,
+    'revert': Revert,
+    'conflict-revert': ConflictRevert,
+    'cherry-pick': CherryPick,
+    'conflict-cherry-pick': ConflictCherryPick,
+    'change-message': ChangeMessage,
+    'squash-commits': SquashCommit,
+    'reorganize-commits': ReorganizeCommits,
+    'drop': Drop,
+    'stash': Stash,
+    'apply-stash': ApplyStash,
+    'blame': Blame,
+}
+
+
 def main():
-    # Define tasks:
-    task_classes = {
-        'switch': Switch,
-        'add': Add,
-        'commit': Commit,
-        'log': Log,
-        'diff': Diff,
-        'new-branch': NewBranch,
-        'delete-branch': DeleteBranch,
-        'merge': Merge,
-        'rebase': Rebase,
-        'conflict-rebase': ConflictRebase,
-        'commit-amend': CommitAmend,
-        'reset-hard': ResetHard,
-        'reset-soft': ResetSoft,
-        'revert': Revert,
-        'conflict-revert': ConflictRevert,
-        'cherry-pick': CherryPick,
-        'conflict-cherry-pick': ConflictCherryPick,
-        'change-message': ChangeMessage,
-        'squash-commits': SquashCommit,
-        'reorganize-commits': ReorganizeCommits,
-        'drop': Drop,
-        'stash': Stash,
-        'apply-stash': ApplyStash,
-        'blame': Blame,
-    }
-
-    parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter, epilog="List of tasks: \n  %s" % '\n  '.join(task_classes.keys()))
-    parser.add_argument('taskname', help='Name of a task')
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter, epilog="List of tasks: \n  %s" % '\n  '.join(TASKS.keys()))
+    parser.add_argument('taskname', choices=TASKS, metavar='taskname', help='Name of a task')
     parser.add_argument('command', choices=['start', 'check'], help='Command to run')
     args = parser.parse_args(args=None if sys.argv[1:] else ['--help'])
 
-    if args.taskname not in task_classes:
-        raise TaskException('Task "%s" not found.' % args.taskname)
+    if args.command == 'check':
+        # Checks only read the repository, so don't let `git status` take the index lock to refresh
+        # the index (and clash with an editor or another git running at the same time).
+        os.environ.setdefault('GIT_OPTIONAL_LOCKS', '0')
 
-    task = task_classes[args.taskname]()
-    func = getattr(task, args.command, None)
-    if not callable(func):
-        raise TaskException(
-            'Command "%s" for task "%s" not found.' % (args.command, args.taskname)
-        )
-    func()
+    # Every task implements both commands, argparse has already validated the names.
+    task = TASKS[args.taskname]()
+    getattr(task, args.command)()
 
 
 if __name__ == "__main__":